@@ -152,7 +152,8 @@ async def main():
     
     # Ingest into vector database
     logger.info("Ingesting documents into vector database...")
-    async with VectorService() as vector_service:
+    # Ingestion may recreate a collection whose schema is outdated
+    async with VectorService(recreate=True) as vector_service:
         success = await vector_service.insert_documents(filtered_documents)
         
         if success:
@@ -110,11 +110,13 @@ async def ask(request: QueryRequest):
         raise HTTPException(status_code=503, detail="VectorService is not available")
 
     try:
-        # Perform hybrid search
+        # Perform hybrid search; section texts are only needed up front for reranking
         logger.info(f"Processing query: {request.query}")
+        rerank = bool(request.use_reranking and openai_client)
         search_results = await vector_service.hybrid_search(
             query=request.query,
-            top_k=request.top_k * 2  # Get more results for reranking
+            top_k=request.top_k * 2,  # Get more results for reranking
+            include_text=rerank
         )
         
         if not search_results:
@@ -125,7 +127,7 @@ async def ask(request: QueryRequest):
             )
 
         # Rerank documents if requested
-        if request.use_reranking and openai_client:
+        if rerank:
             logger.info("Reranking documents with OpenAI...")
             reranked_results = await rerank_documents_with_openai(
                 query=request.query,
@@ -135,6 +137,10 @@ async def ask(request: QueryRequest):
             final_results = reranked_results[:request.top_k]
         else:
             final_results = search_results[:request.top_k]
+            # Fetch texts only for the documents that will actually be used
+            texts = await vector_service.fetch_texts([doc["chunk_id"] for doc in final_results])
+            for doc in final_results:
+                doc["section_text"] = texts.get(doc["chunk_id"], "")
 
         # Generate response
         logger.info("Generating RAG response...")
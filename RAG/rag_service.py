@@ -30,7 +30,8 @@ class RAGService:
 
         documents = await self.vector_service.hybrid_search(
             query=query,
-            top_k=top_k * 2
+            top_k=top_k * 2,
+            include_text=True
         )
 
         if not documents:
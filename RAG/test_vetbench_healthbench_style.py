@@ -32,7 +32,8 @@ class BoviCareRAGSystemHealthBenchStyle:
             # Perform hybrid search (get more results for reranking)
             search_results = await self.vector_service.hybrid_search(
                 query=query,
-                top_k=6  # Get more results for reranking
+                top_k=6,  # Get more results for reranking
+                include_text=True
             )
             
             if not search_results:
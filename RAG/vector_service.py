@@ -1,10 +1,19 @@
 import os
+import json
+import atexit
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+import functools
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pymilvus import MilvusClient, DataType
 from dotenv import load_dotenv
 import mmh3
+import numpy as np
+import diskcache
 from sentence_transformers import SentenceTransformer
 from urllib.parse import urlparse
 
@@ -15,6 +24,146 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Pre-quantized int8 ONNX export published in the model repository; override with
+# EMBEDDING_ONNX_FILE (e.g. model_quint8_avx2.onnx) to match the host CPU
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "model_qint8_avx512_vnni.onnx")
+
+# Dense vectors are stored, cached and sent to Milvus as float16; the model's
+# output is L2-normalized so the precision loss does not affect IP ranking.
+VECTOR_DTYPE = np.float16
+
+# Documents embedded per pipeline step in insert_documents
+EMBED_BATCH_SIZE = 128
+
+# Embedded rows are buffered into upserts of this many rows, at most
+# INSERT_CONCURRENCY of them in flight while embedding continues
+INSERT_BATCH_SIZE = 500
+INSERT_CONCURRENCY = 4
+
+# Default HNSW search breadth; larger values trade latency for recall
+DEFAULT_SEARCH_EF = 64
+
+# Metadata returned for every search hit; section_text is only added on request
+SEARCH_OUTPUT_FIELDS = [
+    "document_id",
+    "disease_type",
+    "disease_name",
+    "disease_id",
+    "chunk_id",
+    "chunk_index",
+    "section_type",
+    "page_number"
+]
+
+# Maximum number of embeddings kept in the in-process cache
+EMBEDDING_MEMORY_CACHE_SIZE = 10_000
+
+# Query-result cache size and the cosine similarity at which a cached query
+# is considered equivalent to a new one
+QUERY_CACHE_SIZE = 512
+QUERY_CACHE_SIMILARITY = 0.97
+
+# Seconds a cached result stays valid; bounds staleness after writes made by another
+# process (e.g. ingest_data.py), which cannot invalidate this process's cache
+QUERY_CACHE_TTL = 300
+
+_embed_model_lock = threading.Lock()
+
+# Dedicated thread pools so blocking Milvus calls and model inference do not
+# compete with each other or with the event loop's default executor
+_MILVUS_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="milvus")
+_EMBED_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="embed")
+
+# Milvus clients shared across VectorService instances, keyed by connection target
+_CLIENTS: Dict[tuple, MilvusClient] = {}
+_clients_lock = threading.Lock()
+
+# (connection target, collection name) pairs whose collection setup already ran in this process
+_SETUP_DONE: set = set()
+
+# Set once the shared embedding model has been warmed up in this process
+_model_warmed = False
+
+
+@functools.lru_cache(maxsize=1)
+def _load_embed_model(name: str) -> SentenceTransformer:
+    try:
+        model = SentenceTransformer(
+            name,
+            backend="onnx",
+            model_kwargs={"file_name": EMBEDDING_ONNX_FILE}
+        )
+        logger.info(f"Loaded embedding model {name} with ONNX Runtime ({EMBEDDING_ONNX_FILE})")
+        return model
+    except Exception as e:
+        logger.warning(f"ONNX Runtime backend unavailable, falling back to PyTorch: {e}")
+
+    logger.info(f"Loading embedding model: {name}")
+    return SentenceTransformer(name)
+
+
+def _get_embed_model(name: str) -> SentenceTransformer:
+    """Return the process-wide embedding model, loading it only once."""
+    with _embed_model_lock:
+        return _load_embed_model(name)
+
+
+async def _run_milvus(fn, *args, **kwargs):
+    """Run a blocking Milvus client call on the Milvus thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_MILVUS_POOL, functools.partial(fn, *args, **kwargs))
+
+
+async def _run_embed(fn, *args, **kwargs):
+    """Run blocking embedding work on the embedding thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EMBED_POOL, functools.partial(fn, *args, **kwargs))
+
+
+def _field_str(doc: Dict[str, Any], name: str) -> str:
+    """Read a document field as a string without re-converting values that already are."""
+    value = doc.get(name, '')
+    return value if isinstance(value, str) else str(value)
+
+
+def _content_hash(row: Dict[str, str], embedding_signature: str) -> str:
+    """
+    Hex mmh3 128-bit hash of a row's scalar fields and the embedding model that
+    produced its vector, stored to detect unchanged chunks. Any metadata edit or
+    a change of embedding model/backend/export yields a different hash.
+    """
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False)
+    return format(mmh3.hash128(f"{embedding_signature}\n{payload}"), "032x")
+
+
+def _is_blank(text: str) -> bool:
+    return not text or text.isspace()
+
+
+def _get_milvus_client(key: tuple, factory) -> MilvusClient:
+    """Return the cached Milvus client for key, creating it with factory on first use."""
+    with _clients_lock:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = factory()
+            _CLIENTS[key] = client
+        return client
+
+
+@atexit.register
+def _close_milvus_clients():
+    """Close all shared Milvus clients on interpreter shutdown."""
+    with _clients_lock:
+        for client in _CLIENTS.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.error(f"Error closing Milvus client: {e}")
+        _CLIENTS.clear()
+
+
 class VectorService:
     """
     Async service class for interacting with Milvus vector database, using BM25 for sparse search.
@@ -22,53 +171,117 @@ class VectorService:
     
     def __init__(
         self, 
-        collection_name: str = "BoviCareDocuments"
+        collection_name: str = "BoviCareDocuments",
+        recreate: bool = False
     ):
         """
         Initialize the VectorService for Milvus.
+
+        recreate allows an existing collection with an outdated schema to be dropped
+        and recreated; it is meant for ingestion only. Without it, an outdated
+        schema makes initialize() fail instead of deleting data.
         """
         self.milvus_uri = os.getenv("MILVUS_URI")
         self.api_token = os.getenv("MILVUS_API_TOKEN")
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.collection_name = collection_name
-        self.embedding_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self.recreate = recreate
+        self.embedding_model = _get_embed_model(EMBEDDING_MODEL_NAME)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
 
+        # Writable local directory for Milvus Lite storage and the embedding cache
+        self.local_db_dir = os.getenv("MILVUS_DATA_DIR")
+        if not self.local_db_dir:
+            # fallback when running local scripts
+            self.local_db_dir = os.path.join(self.base_dir, "milvus_data")
+        os.makedirs(self.local_db_dir, exist_ok=True)
+
+        # Two-tier embedding cache keyed by the content hash of the text
+        self._emb_mem: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._emb_lock = threading.Lock()
+        # Separate on-disk cache per model, backend and ONNX export, since each
+        # combination produces slightly different vectors
+        backend = getattr(self.embedding_model, "backend", "torch")
+        embedding_variant = [EMBEDDING_MODEL_NAME.replace("/", "__"), backend]
+        if backend == "onnx":
+            embedding_variant.append(os.path.splitext(EMBEDDING_ONNX_FILE)[0])
+        self.embedding_signature = "/".join(embedding_variant)
+        self._emb_disk = diskcache.Cache(os.path.join(
+            self.local_db_dir,
+            "emb_cache",
+            *embedding_variant
+        ))
+
+        # Semantic cache of search results:
+        # (normalized query, top_k, include_text, ef) -> (query vector, documents, expiry time)
+        self._query_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # Bumped when writes start and finish so searches that overlapped a write
+        # do not cache their (possibly stale) results
+        self._cache_generation = 0
+        self._writes_in_flight = 0
+
         if self.milvus_uri:
             logger.info(f"Connecting to Milvus server at URI: {self.milvus_uri}")
-            self.client = MilvusClient(uri=self.milvus_uri, token=self.api_token)
+            self._client_key = (self.milvus_uri, self.api_token)
+            self.client = _get_milvus_client(
+                self._client_key,
+                lambda: MilvusClient(uri=self.milvus_uri, token=self.api_token)
+            )
         else:
             # Use Milvus Lite with a writable local directory (defaulting to repo's milvus_data)
             logger.info("Using Milvus Lite with local storage directory")
-            self.local_db_dir = os.getenv("MILVUS_DATA_DIR")
-            if not self.local_db_dir:
-                # fallback when running local scripts
-                self.local_db_dir = os.path.join(self.base_dir, "milvus_data")
-            os.makedirs(self.local_db_dir, exist_ok=True)
             self.local_db_path = os.path.join(
                 self.local_db_dir,
                 f"milvus_data_{self.collection_name}.db"
             )
             logger.info(f"Milvus Lite storage path: {self.local_db_path}")
             # For local Milvus Lite, pass path directly (positional arg)
-            self.client = MilvusClient(self.local_db_path)
+            self._client_key = ("lite", self.local_db_path)
+            self.client = _get_milvus_client(
+                self._client_key,
+                lambda: MilvusClient(self.local_db_path)
+            )
 
     async def initialize(self):
         """Async initialization method to set up the collection."""
-        await self._setup_collection()
+        setup_key = (self._client_key, self.collection_name)
+        if setup_key not in _SETUP_DONE:
+            await self._setup_collection()
+            _SETUP_DONE.add(setup_key)
+        self._start_warmup()
+
+    def _start_warmup(self):
+        """
+        Run a throwaway encode in the background so the first real query does not pay
+        the model's one-time kernel selection cost. The Milvus client is already warm
+        from the collection setup calls.
+        """
+        global _model_warmed
+        if _model_warmed:
+            return
+        _model_warmed = True
+
+        async def _warmup():
+            try:
+                await _run_embed(self.embedding_model.encode, "warmup", normalize_embeddings=True)
+                logger.info("Embedding model warmed up")
+            except Exception as e:
+                logger.warning(f"Embedding model warm-up failed: {e}")
+
+        self._warmup_task = asyncio.create_task(_warmup())
 
     async def _setup_collection(self):
         """Create the Milvus collection with a hybrid search schema using BM25."""
         try:
-            # Run blocking Milvus operations in a thread
-            has_collection = await asyncio.to_thread(self.client.has_collection, self.collection_name)
+            # Run blocking Milvus operations on the Milvus thread pool
+            has_collection = await _run_milvus(self.client.has_collection, self.collection_name)
             
             if has_collection:
                 logger.info(f"Collection '{self.collection_name}' already exists")
                 # Check if we need to recreate due to schema changes
                 try:
                     # Try to get collection info to check schema
-                    collection_info = await asyncio.to_thread(
+                    collection_info = await _run_milvus(
                         self.client.describe_collection, 
                         collection_name=self.collection_name
                     )
@@ -77,11 +290,28 @@ class VectorService:
                     logger.warning(f"Could not describe collection, may need recreation: {e}")
                     # Drop and recreate if there are issues
                     logger.info("Dropping existing collection to recreate with new schema...")
-                    await asyncio.to_thread(
+                    await _run_milvus(
                         self.client.drop_collection, 
                         collection_name=self.collection_name
                     )
                     has_collection = False
+                else:
+                    if not self._schema_is_current(collection_info):
+                        if not self.recreate:
+                            message = (
+                                f"Collection '{self.collection_name}' has an outdated schema "
+                                "(float16 dense_vector and content_hash are required). "
+                                "Run ingest_data.py to recreate and re-ingest it."
+                            )
+                            logger.error(message)
+                            raise RuntimeError(message)
+                        logger.warning(f"Collection '{self.collection_name}' has an outdated schema")
+                        logger.info("Dropping existing collection to recreate with new schema...")
+                        await _run_milvus(
+                            self.client.drop_collection,
+                            collection_name=self.collection_name
+                        )
+                        has_collection = False
             
             if not has_collection:
                 logger.info(f"Creating collection '{self.collection_name}' with new schema...")
@@ -101,19 +331,29 @@ class VectorService:
                 schema.add_field(field_name="section_type", datatype=DataType.VARCHAR, max_length=256)
                 schema.add_field(field_name="page_number", datatype=DataType.VARCHAR, max_length=256)
                 schema.add_field(field_name="section_text", datatype=DataType.VARCHAR, max_length=65535, enable_analyzer=True)
-                schema.add_field(field_name="dense_vector", datatype=DataType.FLOAT_VECTOR, dim=self.embedding_dim)
+                schema.add_field(field_name="content_hash", datatype=DataType.VARCHAR, max_length=32)
+                schema.add_field(field_name="dense_vector", datatype=DataType.FLOAT16_VECTOR, dim=self.embedding_dim)
 
                 # Prepare index parameters for both dense and sparse vectors
                 index_params = self.client.prepare_index_params()
-                index_params.add_index(
-                    field_name="dense_vector",
-                    index_type="IVF_FLAT",
-                    metric_type="IP",
-                    params={"nlist": 128}
-                )
+                if self.milvus_uri:
+                    # HNSW needs no training and gives better recall/latency than IVF at this scale
+                    index_params.add_index(
+                        field_name="dense_vector",
+                        index_type="HNSW",
+                        metric_type="IP",
+                        params={"M": 16, "efConstruction": 200}
+                    )
+                else:
+                    # Milvus Lite only builds its own index types, so let it choose
+                    index_params.add_index(
+                        field_name="dense_vector",
+                        index_type="AUTOINDEX",
+                        metric_type="IP"
+                    )
 
                 # Create collection with the schema and dense index.
-                await asyncio.to_thread(
+                await _run_milvus(
                     self.client.create_collection,
                     collection_name=self.collection_name,
                     schema=schema,
@@ -128,63 +368,127 @@ class VectorService:
             logger.error(f"Error setting up collection: {e}")
             raise
 
+    @staticmethod
+    def _schema_is_current(collection_info: Dict[str, Any]) -> bool:
+        """Check that an existing collection has content hashes and float16 dense vectors."""
+        fields = {field.get("name"): field.get("type") for field in collection_info.get("fields", [])}
+        return (
+            fields.get("dense_vector") == DataType.FLOAT16_VECTOR
+            and "content_hash" in fields
+        )
+
     async def insert_documents(self, documents: List[Dict[str, Any]]) -> bool:
-        """Insert documents into the collection."""
+        """
+        Insert or update documents in the collection.
+
+        Documents whose chunk already exists with the same content hash (all stored
+        fields plus the embedding model) are skipped, so re-running ingestion only
+        embeds and upserts new or changed chunks.
+        Embedding and upserting run as a pipeline: embedded rows are buffered and
+        flushed to Milvus in INSERT_BATCH_SIZE upserts (up to INSERT_CONCURRENCY at
+        once) while the following documents are still being embedded. When that many
+        upserts are pending, the consumer waits for the oldest one, which in turn
+        fills the bounded queue and pauses embedding.
+        Documents are processed shortest text first so each encode batch pads to
+        a similar length.
+        """
         try:
             if not documents:
                 logger.warning("No documents to insert")
                 return False
 
-            # Prepare data for insertion
-            data = []
-            for i, doc in enumerate(documents):
-                try:
-                    # Generate dense embeddings using local model
-                    dense_vector = await self._get_dense_embedding(doc.get('section_text', ''))
-                    
-                    # Ensure all required fields are present and properly formatted
-                    chunk_id = str(doc.get('chunk_id', '')).strip()
-                    if not chunk_id:
-                        chunk_id = f"chunk_{i + 1}"
-                    
-                    document_data = {
-                        "id": chunk_id,
-                        "document_id": str(doc.get('document_id', '')),
-                        "disease_type": str(doc.get('disease_type', '')),
-                        "disease_name": str(doc.get('disease_name', '')),
-                        "disease_id": str(doc.get('disease_id', '')),
-                        "chunk_id": chunk_id,
-                        "chunk_index": str(doc.get('chunk_index', '')),
-                        "section_type": str(doc.get('section_type', '')),
-                        "page_number": str(doc.get('page_number', '')),
-                        "section_text": str(doc.get('section_text', '')),
-                        "dense_vector": dense_vector
-                    }
-                    
-                    data.append(document_data)
-                    
-                except Exception as doc_error:
-                    logger.error(f"Error processing document {i}: {doc_error}")
-                    logger.error(f"Document data: {doc}")
-                    continue
-
-            if not data:
+            rows = [self._build_row(doc, i) for i, doc in enumerate(documents)]
+            valid = [i for i, row in enumerate(rows) if row is not None]
+            if not valid:
                 logger.error("No valid documents to insert after processing")
                 return False
 
-            # Log sample data for debugging
-            logger.info(f"Sample document data for insertion:")
-            logger.info(f"  - ID: {data[0].get('id')} (type: {type(data[0].get('id'))})")
-            logger.info(f"  - chunk_id: {data[0].get('chunk_id')} (type: {type(data[0].get('chunk_id'))})")
+            hashes = {i: _content_hash(rows[i], self.embedding_signature) for i in valid}
+            existing = await self._get_content_hashes([rows[i]["id"] for i in valid])
+            pending = [i for i in valid if existing.get(rows[i]["id"]) != hashes[i]]
+            if not pending:
+                logger.info(f"All {len(valid)} documents are already up to date")
+                return True
+            if len(pending) < len(valid):
+                logger.info(f"Skipping {len(valid) - len(pending)} unchanged documents")
 
-            # Insert data
-            await asyncio.to_thread(
-                self.client.insert,
-                collection_name=self.collection_name,
-                data=data
-            )
-            
-            logger.info(f"Successfully inserted {len(data)} documents")
+            order = sorted(pending, key=lambda i: len(rows[i]["section_text"]))
+            queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+            # Upload tasks not yet awaited, oldest first
+            uploads: deque = deque()
+
+            async def produce():
+                for start in range(0, len(order), EMBED_BATCH_SIZE):
+                    indices = order[start:start + EMBED_BATCH_SIZE]
+                    embeddings = await self._get_dense_embeddings(
+                        [rows[i]["section_text"] for i in indices]
+                    )
+                    await queue.put((indices, embeddings))
+                await queue.put(None)
+
+            async def wait_oldest_upload() -> int:
+                # Shielded so cancelling the consumer never interrupts a write; an upload
+                # left in the deque is awaited by insert_documents before it returns
+                await asyncio.shield(uploads[0])
+                return uploads.popleft().result()
+
+            async def consume() -> Tuple[int, int]:
+                built = flushed = inserted = 0
+                buffer: List[Dict[str, Any]] = []
+                while True:
+                    item = await queue.get()
+                    if item is not None:
+                        indices, embeddings = item
+                        data = [
+                            {**rows[i], "content_hash": hashes[i], "dense_vector": embeddings[offset]}
+                            for offset, i in enumerate(indices)
+                        ]
+                        if not built:
+                            # Log sample data for debugging
+                            logger.info(f"Sample document data for insertion:")
+                            logger.info(f"  - ID: {data[0].get('id')} (type: {type(data[0].get('id'))})")
+                            logger.info(f"  - chunk_id: {data[0].get('chunk_id')} (type: {type(data[0].get('chunk_id'))})")
+                        built += len(data)
+                        buffer.extend(data)
+
+                    # Flush full slices as they fill up, and the remainder at the end
+                    while len(buffer) >= INSERT_BATCH_SIZE or (item is None and buffer):
+                        if len(uploads) >= INSERT_CONCURRENCY:
+                            inserted += await wait_oldest_upload()
+                        batch, buffer = buffer[:INSERT_BATCH_SIZE], buffer[INSERT_BATCH_SIZE:]
+                        uploads.append(asyncio.create_task(self._upsert_batch(flushed, batch)))
+                        flushed += len(batch)
+
+                    if item is None:
+                        while uploads:
+                            inserted += await wait_oldest_upload()
+                        return built, inserted
+
+            self._writes_in_flight += 1
+            self._cache_generation += 1
+            producer = asyncio.create_task(produce())
+            consumer = asyncio.create_task(consume())
+            try:
+                await asyncio.wait({producer, consumer}, return_when=asyncio.FIRST_EXCEPTION)
+                for task in (producer, consumer):
+                    if task.done() and task.exception() is not None:
+                        raise task.exception()
+                built, inserted = consumer.result()
+            finally:
+                # Stop whichever side is still running, then let every started
+                # upload finish so no write lands after the cache is released
+                for task in (producer, consumer):
+                    task.cancel()
+                await asyncio.gather(producer, consumer, *uploads, return_exceptions=True)
+                self._writes_in_flight -= 1
+                self._cache_generation += 1
+                self._query_cache.clear()
+
+            if inserted < built:
+                logger.error(f"Inserted {inserted} of {built} documents")
+                return False
+
+            logger.info(f"Successfully inserted {built} documents")
             return True
             
         except Exception as e:
@@ -192,70 +496,296 @@ class VectorService:
             logger.error(f"Error type: {type(e)}")
             return False
 
-    async def _get_dense_embedding(self, text: str) -> List[float]:
-        if not text.strip():
-            return [0.0] * self.embedding_dim
+    async def _get_content_hashes(self, ids: List[str]) -> Dict[str, str]:
+        """Fetch the stored content hash of each existing chunk among ids in one request."""
+        try:
+            rows = await _run_milvus(
+                self.client.get,
+                collection_name=self.collection_name,
+                ids=list(dict.fromkeys(ids)),
+                output_fields=["id", "content_hash"]
+            )
+            return {row["id"]: row.get("content_hash") for row in rows}
+        except Exception as e:
+            logger.warning(f"Could not read existing content hashes, processing all documents: {e}")
+            return {}
+
+    def _build_row(self, doc: Dict[str, Any], i: int) -> Optional[Dict[str, str]]:
+        """Build the scalar fields of a Milvus row, or None if the document is malformed."""
+        try:
+            # Ensure all required fields are present and properly formatted
+            chunk_id = _field_str(doc, 'chunk_id').strip()
+            if not chunk_id:
+                chunk_id = f"chunk_{i + 1}"
+
+            return {
+                "id": chunk_id,
+                "document_id": _field_str(doc, 'document_id'),
+                "disease_type": _field_str(doc, 'disease_type'),
+                "disease_name": _field_str(doc, 'disease_name'),
+                "disease_id": _field_str(doc, 'disease_id'),
+                "chunk_id": chunk_id,
+                "chunk_index": _field_str(doc, 'chunk_index'),
+                "section_type": _field_str(doc, 'section_type'),
+                "page_number": _field_str(doc, 'page_number'),
+                "section_text": _field_str(doc, 'section_text')
+            }
+
+        except Exception as doc_error:
+            logger.error(f"Error processing document {i}: {doc_error}")
+            logger.error(f"Document data: {doc}")
+            return None
+
+    async def _upsert_batch(self, start: int, batch: List[Dict[str, Any]]) -> int:
+        """Upsert one slice of rows and return how many were written."""
+        try:
+            await _run_milvus(
+                self.client.upsert,
+                collection_name=self.collection_name,
+                data=batch
+            )
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Error upserting batch starting at row {start}: {e}")
+            return 0
+
+    def _cache_get(self, key: int) -> Optional[np.ndarray]:
+        """Look up an embedding in memory first, then on disk (promoting disk hits)."""
+        with self._emb_lock:
+            vector = self._emb_mem.get(key)
+            if vector is not None:
+                self._emb_mem.move_to_end(key)
+                return vector
+
+        raw = self._emb_disk.get(key)
+        if raw is None:
+            return None
+
+        vector = np.frombuffer(raw, dtype=VECTOR_DTYPE)
+        self._cache_put_memory(key, vector)
+        return vector
+
+    def _cache_put_memory(self, key: int, vector: np.ndarray):
+        with self._emb_lock:
+            self._emb_mem[key] = vector
+            self._emb_mem.move_to_end(key)
+            while len(self._emb_mem) > EMBEDDING_MEMORY_CACHE_SIZE:
+                self._emb_mem.popitem(last=False)
+
+    def _cache_put(self, key: int, vector: np.ndarray) -> np.ndarray:
+        """
+        Store an embedding in both cache tiers and return the stored vector.
+
+        Cached vectors are read-only since the same array is shared by every
+        later lookup of that text.
+        """
+        vector = np.array(vector, dtype=VECTOR_DTYPE)
+        vector.flags.writeable = False
+        self._cache_put_memory(key, vector)
+        self._emb_disk.set(key, vector.tobytes())
+        return vector
+
+    async def _get_dense_embeddings(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Encode a list of texts in batches, returning one row per input text.
+
+        Cached embeddings are reused and only the misses go through the model,
+        each distinct text once even if it repeats in the input. Misses are
+        sorted by length before encoding so each batch pads to a similar length,
+        and results are scattered back to every position. Blank texts get a zero
+        vector.
+        """
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=VECTOR_DTYPE)
 
         def _encode():
-            return self.embedding_model.encode(text, normalize_embeddings=True).tolist()
+            # content hash -> positions in texts that still need encoding
+            misses: Dict[int, List[int]] = {}
+            for i, text in enumerate(texts):
+                if _is_blank(text):
+                    continue
+                key = mmh3.hash128(text)
+                if key in misses:
+                    misses[key].append(i)
+                    continue
+                cached = self._cache_get(key)
+                if cached is not None:
+                    embeddings[i] = cached
+                else:
+                    misses[key] = [i]
 
-        return await asyncio.to_thread(_encode)
+            if not misses:
+                return embeddings
+
+            unique = sorted(misses, key=lambda key: len(texts[misses[key][0]]))
+            encoded = self.embedding_model.encode(
+                [texts[misses[key][0]] for key in unique],
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            for key, vector in zip(unique, encoded):
+                embeddings[misses[key]] = self._cache_put(key, vector)
+            return embeddings
+
+        return await _run_embed(_encode)
 
     async def hybrid_search(
         self,
         query: str,
-        top_k: int = 10
+        top_k: int = 10,
+        include_text: bool = False,
+        ef: int = DEFAULT_SEARCH_EF
     ) -> List[Dict[str, Any]]:
         """
         Realiza busca vetorial densa utilizando o campo "dense_vector".
+        Por padrão retorna apenas metadados; use include_text=True para trazer o
+        "section_text" de cada resultado, ou fetch_texts para buscá-lo depois.
+        Aumente "ef" para buscas que exigem maior recall (ex.: diagnósticos difíceis).
+        """
+        results = await self.hybrid_search_batch([query], top_k=top_k, include_text=include_text, ef=ef)
+        return results[0]
+
+    async def hybrid_search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        include_text: bool = False,
+        ef: int = DEFAULT_SEARCH_EF
+    ) -> List[List[Dict[str, Any]]]:
         """
+        Realiza busca vetorial densa para várias consultas em uma única chamada ao Milvus.
+        Retorna uma lista de resultados por consulta, na mesma ordem de entrada.
+        """
+        if not queries:
+            return []
+
         try:
-            query_embedding = await self._get_dense_embedding(query)
+            query_embeddings = await self._get_dense_embeddings(queries, batch_size=32)
+            # HNSW requires ef >= top_k
+            ef = max(ef, top_k)
+            cache_keys = [(" ".join(query.lower().split()), top_k, include_text, ef) for query in queries]
+            batch_documents = self._query_cache_lookup(cache_keys, query_embeddings)
+            generation = self._cache_generation
 
-            results = await asyncio.to_thread(
+            misses = [i for i, documents in enumerate(batch_documents) if documents is None]
+            if not misses:
+                return batch_documents
+
+            results = await _run_milvus(
                 self.client.search,
                 collection_name=self.collection_name,
-                data=[query_embedding],
+                data=[query_embeddings[i] for i in misses],
                 anns_field="dense_vector",
-                search_params={"metric_type": "IP", "params": {"nprobe": 10}},
+                search_params={"metric_type": "IP", "params": {"ef": ef}},
                 limit=top_k,
-                output_fields=[
-                    "document_id",
-                    "disease_type",
-                    "disease_name",
-                    "disease_id",
-                    "chunk_id",
-                    "chunk_index",
-                    "section_type",
-                    "page_number",
-                    "section_text"
-                ]
+                output_fields=SEARCH_OUTPUT_FIELDS + (["section_text"] if include_text else [])
             )
 
-            documents: List[Dict[str, Any]] = []
-            if results and results[0]:
-                for hit in results[0]:
-                    entity = hit.get('entity', {})
-                    documents.append({
-                        "document_id": entity.get("document_id", ""),
-                        "disease_type": entity.get("disease_type", ""),
-                        "disease_name": entity.get("disease_name", ""),
-                        "disease_id": entity.get("disease_id", ""),
-                        "chunk_id": entity.get("chunk_id", ""),
-                        "chunk_index": entity.get("chunk_index", ""),
-                        "section_type": entity.get("section_type", ""),
-                        "page_number": entity.get("page_number", ""),
-                        "section_text": entity.get("section_text", ""),
-                        "score": hit.get("distance", 0.0)
-                    })
-
-            logger.info(f"Found {len(documents)} documents from dense vector search.")
-            return documents
+            # Only cache results if no write started or finished while searching
+            cacheable = not self._writes_in_flight and generation == self._cache_generation
+            for n, i in enumerate(misses):
+                hits = results[n] if results and n < len(results) else []
+                documents = [self._hit_to_document(hit) for hit in hits or []]
+                if cacheable:
+                    self._query_cache_put(cache_keys[i], query_embeddings[i], documents)
+                batch_documents[i] = [dict(doc) for doc in documents]
+                logger.info(f"Found {len(documents)} documents from dense vector search.")
+            return batch_documents
 
         except Exception as e:
             logger.error(f"Error in dense search: {e}")
             raise
 
+    def _query_cache_lookup(
+        self,
+        cache_keys: List[tuple],
+        query_embeddings: np.ndarray
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Return cached documents per query, or None for queries that must hit Milvus.
+        Exact matches on the normalized text are checked first; the rest are compared
+        against cached query vectors with the same search options in a single matrix product.
+        Entries older than QUERY_CACHE_TTL are dropped first.
+        """
+        now = time.monotonic()
+        for key in [key for key, entry in self._query_cache.items() if entry[2] <= now]:
+            del self._query_cache[key]
+
+        found: List[Optional[List[Dict[str, Any]]]] = [None] * len(cache_keys)
+        pending = []
+        for i, key in enumerate(cache_keys):
+            entry = self._query_cache.get(key)
+            if entry is not None:
+                self._query_cache.move_to_end(key)
+                found[i] = [dict(doc) for doc in entry[1]]
+            else:
+                pending.append(i)
+
+        for options in {cache_keys[i][1:] for i in pending}:
+            candidates = [key for key in self._query_cache if key[1:] == options]
+            queries = [i for i in pending if cache_keys[i][1:] == options]
+            if not candidates:
+                continue
+
+            cached_vectors = np.stack([self._query_cache[key][0] for key in candidates]).astype(np.float32)
+            similarities = query_embeddings[queries].astype(np.float32) @ cached_vectors.T
+            best = similarities.argmax(axis=1)
+            for row, i in enumerate(queries):
+                if similarities[row, best[row]] >= QUERY_CACHE_SIMILARITY:
+                    key = candidates[best[row]]
+                    self._query_cache.move_to_end(key)
+                    found[i] = [dict(doc) for doc in self._query_cache[key][1]]
+
+        return found
+
+    def _query_cache_put(self, key: tuple, vector: np.ndarray, documents: List[Dict[str, Any]]):
+        self._query_cache[key] = (vector, documents, time.monotonic() + QUERY_CACHE_TTL)
+        self._query_cache.move_to_end(key)
+        while len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+
+    async def fetch_texts(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """
+        Busca o "section_text" apenas dos chunks informados, em uma única consulta
+        pela chave primária (insert_documents grava sempre id == chunk_id).
+        Retorna um dicionário chunk_id -> section_text.
+        """
+        chunk_ids = list(dict.fromkeys(chunk_id for chunk_id in chunk_ids if chunk_id))
+        if not chunk_ids:
+            return {}
+
+        try:
+            rows = await _run_milvus(
+                self.client.get,
+                collection_name=self.collection_name,
+                ids=chunk_ids,
+                output_fields=["chunk_id", "section_text"]
+            )
+            return {row["chunk_id"]: row.get("section_text", "") for row in rows}
+
+        except Exception as e:
+            logger.error(f"Error fetching section texts: {e}")
+            raise
+
+    @staticmethod
+    def _hit_to_document(hit: Dict[str, Any]) -> Dict[str, Any]:
+        entity = hit.get('entity', {})
+        document = {
+            "document_id": entity.get("document_id", ""),
+            "disease_type": entity.get("disease_type", ""),
+            "disease_name": entity.get("disease_name", ""),
+            "disease_id": entity.get("disease_id", ""),
+            "chunk_id": entity.get("chunk_id", ""),
+            "chunk_index": entity.get("chunk_index", ""),
+            "section_type": entity.get("section_type", ""),
+            "page_number": entity.get("page_number", ""),
+            "score": hit.get("distance", 0.0)
+        }
+        if "section_text" in entity:
+            document["section_text"] = entity["section_text"]
+        return document
+
     async def __aenter__(self):
         """Async context manager entry."""
         await self.initialize()
@@ -263,7 +793,5 @@ class VectorService:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        try:
-            await asyncio.to_thread(self.client.close)
-        except Exception as e:
-            logger.error(f"Error closing Milvus client: {e}")
+        # The Milvus client is shared process-wide and closed at interpreter exit.
+        self._emb_disk.close()
@@ -1,7 +1,9 @@
 from typing import List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class Diagnosis(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     name: str = Field(description="The name of the diagnosis")
     probability: float = Field(description="The probability of the diagnosis")
     description: str = Field(description="A description of the diagnosis")